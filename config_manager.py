@@ -3,6 +3,7 @@ Configuration management for the Helpdesk Knowledge Base system.
 """
 
 import os
+import functools
 from typing import Dict, Any, Optional
 from enum import Enum
 from dataclasses import dataclass
@@ -125,16 +126,22 @@ class ConfigManager:
         }
 
 
-# Global configuration instance
-_config_manager: Optional[ConfigManager] = None
+@functools.lru_cache(maxsize=None)
+def _cached_config_manager(environment: Environment) -> ConfigManager:
+    """Build the configuration manager for an environment once."""
+    return ConfigManager(environment)
 
 
-def get_config_manager() -> ConfigManager:
-    """Get the global configuration manager instance."""
-    global _config_manager
-    if _config_manager is None:
-        _config_manager = ConfigManager()
-    return _config_manager
+def get_config_manager(environment: Optional[Environment] = None) -> ConfigManager:
+    """
+    Get the shared configuration manager for an environment.
+    
+    Instances are cached per environment and shared by all callers,
+    so treat them as read-only.
+    """
+    if environment is None:
+        environment = Environment(os.getenv('ENVIRONMENT', 'development'))
+    return _cached_config_manager(environment)
 
 
 def get_elasticsearch_config() -> Dict[str, Any]:
@@ -14,7 +14,7 @@ from utils import (
     TextProcessor, DataValidator, DataConverter,
     IDGenerator, QueryParser
 )
-from config_manager import ConfigManager, Environment
+from config_manager import get_config_manager, Environment
 
 
 def create_sample_article():
@@ -252,7 +252,7 @@ def demonstrate_configuration():
     
     # Development environment
     print("Development Environment:")
-    dev_config = ConfigManager(Environment.DEVELOPMENT)
+    dev_config = get_config_manager(Environment.DEVELOPMENT)
     
     es_config = dev_config.get_elasticsearch_config()
     print(f"  Elasticsearch: {es_config['hosts'][0]['host']}:{es_config['hosts'][0]['port']}")
@@ -266,7 +266,7 @@ def demonstrate_configuration():
     
     # Production environment
     print("\nProduction Environment:")
-    prod_config = ConfigManager(Environment.PRODUCTION)
+    prod_config = get_config_manager(Environment.PRODUCTION)
     
     prod_es_config = prod_config.get_elasticsearch_config()
     print(f"  Timeout: {prod_es_config['timeout']}s")
@@ -10,6 +10,17 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Materialized dashboard statistics, refreshed off the request path
+DASHBOARD_STATS_INDEX = "dashboard_stats"
+DASHBOARD_STATS_DOC_ID = "latest"
+DASHBOARD_STATS_SETTINGS = {
+    "number_of_shards": 1,
+    "number_of_replicas": 0,
+    "refresh_interval": "30s"
+}
+# Older statistics are treated as missing, e.g. when the refresher has stopped
+DASHBOARD_STATS_MAX_AGE = 300
+
 
 class HelpdeskElasticsearchManager:
     """
@@ -380,6 +391,192 @@ class HelpdeskElasticsearchManager:
             logger.error(f"Error searching articles: {e}")
             return {'total': 0, 'articles': [], 'from': from_, 'size': size}
     
+    def get_dashboard_aggregations(self, recent_size: int = 5) -> Dict[str, Any]:
+        """
+        Collect the admin dashboard statistics in a single search request.
+        
+        Category counts, difficulty counts, success rate statistics and the
+        most recent articles are all computed as aggregations of one
+        size-0 query instead of separate round-trips.
+        
+        Args:
+            recent_size: Number of recent articles to include
+            
+        Returns:
+            Dict: Total count, category/difficulty counts, success rate
+            statistics and recent articles
+        """
+        try:
+            response = self.es.search(
+                index=self.index_name,
+                body={
+                    "size": 0,
+                    "track_total_hits": True,
+                    "aggs": {
+                        # Low-cardinality keyword fields: map execution avoids
+                        # global ordinals, breadth-first prunes buckets early
+                        "by_category": {
+                            "terms": {
+                                "field": "category",
+                                "size": 50,
+                                "execution_hint": "map",
+                                "collect_mode": "breadth_first"
+                            }
+                        },
+                        "by_difficulty": {
+                            "terms": {
+                                "field": "difficulty_level",
+                                "size": 10,
+                                "execution_hint": "map",
+                                "collect_mode": "breadth_first"
+                            }
+                        },
+                        "success": {
+                            "stats": {"field": "success_rate"}
+                        },
+                        "recent": {
+                            "top_hits": {
+                                "size": recent_size,
+                                "sort": [{"created_at": {"order": "desc"}}],
+                                "_source": ["title", "created_at"]
+                            }
+                        }
+                    }
+                },
+                # Drop shard info and per-bucket extras from the response
+                filter_path=[
+                    "hits.total",
+                    "aggregations.*.buckets.key",
+                    "aggregations.*.buckets.doc_count",
+                    "aggregations.success",
+                    "aggregations.recent.hits.hits._id",
+                    "aggregations.recent.hits.hits._source"
+                ]
+            )
+            
+            aggs = response.get('aggregations', {})
+            
+            success = aggs.get('success', {})
+            success_stats = {}
+            if success.get('count'):
+                success_stats = {
+                    'average': success['avg'],
+                    'highest': success['max'],
+                    'lowest': success['min'],
+                    'total': success['avg']
+                }
+            
+            recent = []
+            for hit in aggs.get('recent', {}).get('hits', {}).get('hits', []):
+                article = hit.get('_source', {})
+                article['_id'] = hit.get('_id')
+                recent.append(article)
+            
+            return {
+                'total': response.get('hits', {}).get('total', {}).get('value', 0),
+                'categories': {
+                    bucket['key']: bucket['doc_count']
+                    for bucket in aggs.get('by_category', {}).get('buckets', [])
+                },
+                'difficulty': {
+                    bucket['key']: bucket['doc_count']
+                    for bucket in aggs.get('by_difficulty', {}).get('buckets', [])
+                },
+                'success_rate': success_stats,
+                'recent': recent
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting dashboard aggregations: {e}")
+            return {}
+    
+    def refresh_dashboard_stats(self, stats_index: str = DASHBOARD_STATS_INDEX) -> bool:
+        """
+        Recompute the dashboard statistics and store them as a single document.
+        
+        Intended to run periodically from a background job so the admin
+        dashboard can read one small document instead of aggregating over
+        the whole article index on every load.
+        
+        Args:
+            stats_index: Name of the index holding the statistics document
+            
+        Returns:
+            bool: True if the statistics were stored, False otherwise
+        """
+        try:
+            stats = self.get_dashboard_aggregations()
+            if not stats:
+                logger.error("No dashboard statistics to store")
+                return False
+            
+            stats['generated_at'] = datetime.utcnow().isoformat()
+            
+            if not self.es.indices.exists(index=stats_index):
+                self.es.indices.create(
+                    index=stats_index,
+                    body={
+                        "settings": DASHBOARD_STATS_SETTINGS,
+                        "mappings": {"dynamic": False}
+                    }
+                )
+            
+            self.es.index(
+                index=stats_index,
+                id=DASHBOARD_STATS_DOC_ID,
+                body=stats
+            )
+            
+            logger.info(f"Dashboard statistics stored in '{stats_index}'")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error refreshing dashboard stats: {e}")
+            return False
+    
+    def get_dashboard_stats(self, stats_index: str = DASHBOARD_STATS_INDEX,
+                            max_age: Optional[float] = DASHBOARD_STATS_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the precomputed dashboard statistics document.
+        
+        Args:
+            stats_index: Name of the index holding the statistics document
+            max_age: Maximum age in seconds of usable statistics, or None
+                to accept statistics of any age
+            
+        Returns:
+            Optional[Dict]: Statistics if they have been computed within
+            max_age seconds, None otherwise
+        """
+        try:
+            response = self.es.get(
+                index=stats_index,
+                id=DASHBOARD_STATS_DOC_ID
+            )
+            
+            if not response.get('found'):
+                return None
+            
+            stats = response.get('_source', {})
+            if max_age is not None:
+                try:
+                    generated_at = datetime.fromisoformat(stats['generated_at'])
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Dashboard statistics in '{stats_index}' have no valid generated_at")
+                    return None
+                age = (datetime.utcnow() - generated_at).total_seconds()
+                if age > max_age:
+                    logger.warning(f"Dashboard statistics in '{stats_index}' are stale ({age:.0f}s old)")
+                    return None
+            return stats
+            
+        except NotFoundError:
+            logger.warning(f"Dashboard statistics not found in '{stats_index}'")
+            return None
+        except Exception as e:
+            logger.error(f"Error retrieving dashboard stats: {e}")
+            return None
+    
     def bulk_index_articles(self, articles: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         Bulk index multiple articles for better performance.
@@ -7,14 +7,22 @@ result processing, and search analytics.
 
 import re
 import json
+import atexit
 import logging
+import functools
+import queue
+import threading
+import time
+import uuid
+import weakref
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from collections import defaultdict, Counter
 import numpy as np
-from elasticsearch import Elasticsearch
-from elasticsearch_dsl import Search, Q, MultiMatch, Match, Term, Range, Bool, FunctionScore
+from elasticsearch import Elasticsearch, helpers
+from elasticsearch_dsl import Search, Q
+from elasticsearch_dsl.query import MultiMatch, Match, Term, Range, Bool, FunctionScore
 from elasticsearch_dsl.query import QueryString, Fuzzy
 
 from models import KnowledgeArticle, DifficultyLevel
@@ -22,6 +30,49 @@ from utils import TextProcessor, QueryParser
 from config_manager import ConfigManager
 
 
+# Intent detection patterns, compiled once at import time
+INTENT_PATTERNS = {
+    'problem': [
+        re.compile(r'\b(error|issue|problem|bug|fail|broken|not working|doesn\'t work|can\'t|won\'t)\b', re.IGNORECASE),
+        re.compile(r'\b(fix|resolve|solve|troubleshoot|repair)\b', re.IGNORECASE),
+        re.compile(r'\b(how to fix|how to resolve|how to solve)\b', re.IGNORECASE)
+    ],
+    'question': [
+        re.compile(r'\b(what|how|why|when|where|which|who)\b', re.IGNORECASE),
+        re.compile(r'\b(explain|describe|tell me|show me)\b', re.IGNORECASE),
+        re.compile(r'\b(what is|how does|why does)\b', re.IGNORECASE)
+    ],
+    'request': [
+        re.compile(r'\b(need|want|require|looking for|searching for)\b', re.IGNORECASE),
+        re.compile(r'\b(help with|assistance with|support for)\b', re.IGNORECASE),
+        re.compile(r'\b(guide|tutorial|instructions|steps)\b', re.IGNORECASE)
+    ]
+}
+
+# Entity extraction patterns
+ENTITY_PATTERNS = {
+    'software': [
+        re.compile(r'\b(windows|mac|linux|ubuntu|centos|debian)\b', re.IGNORECASE),
+        re.compile(r'\b(office|word|excel|powerpoint|outlook)\b', re.IGNORECASE),
+        re.compile(r'\b(chrome|firefox|safari|edge|opera)\b', re.IGNORECASE),
+        re.compile(r'\b(photoshop|illustrator|indesign|premiere)\b', re.IGNORECASE)
+    ],
+    'error_code': [
+        re.compile(r'\b(error\s+\d{3,4}|err\s+\d{3,4})\b', re.IGNORECASE),
+        re.compile(r'\b(0x[0-9a-fA-F]{8}|0x[0-9a-fA-F]{4})\b', re.IGNORECASE),
+        re.compile(r'\b(bsod|blue\s+screen|kernel\s+panic)\b', re.IGNORECASE)
+    ],
+    'hardware': [
+        re.compile(r'\b(printer|scanner|keyboard|mouse|monitor|display)\b', re.IGNORECASE),
+        re.compile(r'\b(router|modem|switch|hub|access\s+point)\b', re.IGNORECASE),
+        re.compile(r'\b(cpu|gpu|ram|ssd|hard\s+drive|motherboard)\b', re.IGNORECASE)
+    ]
+}
+
+# Highlighted fragments in Elasticsearch highlight output
+_HIGHLIGHT_RE = re.compile(r'<em>(.*?)</em>')
+
+
 @dataclass
 class SearchQuery:
     """Represents a processed search query."""
@@ -66,51 +117,51 @@ class SearchAnalytics:
 class QueryPreprocessor:
     """Handles query preprocessing and analysis."""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024):
         self.text_processor = TextProcessor()
         self.query_parser = QueryParser()
         
-        # Intent detection patterns
-        self.intent_patterns = {
-            'problem': [
-                r'\b(error|issue|problem|bug|fail|broken|not working|doesn\'t work|can\'t|won\'t)\b',
-                r'\b(fix|resolve|solve|troubleshoot|repair)\b',
-                r'\b(how to fix|how to resolve|how to solve)\b'
-            ],
-            'question': [
-                r'\b(what|how|why|when|where|which|who)\b',
-                r'\b(explain|describe|tell me|show me)\b',
-                r'\b(what is|how does|why does)\b'
-            ],
-            'request': [
-                r'\b(need|want|require|looking for|searching for)\b',
-                r'\b(help with|assistance with|support for)\b',
-                r'\b(guide|tutorial|instructions|steps)\b'
-            ]
-        }
+        # Repeated queries (popular searches, retries) skip regex/entity work
+        self._preprocess_cached = functools.lru_cache(maxsize=cache_size)(self._preprocess_uncached)
         
-        # Entity extraction patterns
-        self.entity_patterns = {
-            'software': [
-                r'\b(windows|mac|linux|ubuntu|centos|debian)\b',
-                r'\b(office|word|excel|powerpoint|outlook)\b',
-                r'\b(chrome|firefox|safari|edge|opera)\b',
-                r'\b(photoshop|illustrator|indesign|premiere)\b'
-            ],
-            'error_code': [
-                r'\b(error\s+\d{3,4}|err\s+\d{3,4})\b',
-                r'\b(0x[0-9a-fA-F]{8}|0x[0-9a-fA-F]{4})\b',
-                r'\b(bsod|blue\s+screen|kernel\s+panic)\b'
-            ],
-            'hardware': [
-                r'\b(printer|scanner|keyboard|mouse|monitor|display)\b',
-                r'\b(router|modem|switch|hub|access\s+point)\b',
-                r'\b(cpu|gpu|ram|ssd|hard\s+drive|motherboard)\b'
-            ]
-        }
+        # Patterns are compiled once at import time
+        self.intent_patterns = INTENT_PATTERNS
+        self.entity_patterns = ENTITY_PATTERNS
         
     def preprocess_query(self, query: str, filters: Optional[Dict[str, Any]] = None) -> SearchQuery:
         """Preprocess and analyze a search query."""
+        try:
+            filters_key = frozenset((filters or {}).items())
+            search_query = self._preprocess_cached(query, filters_key)
+        except TypeError:
+            # Unhashable filter values can't be cached
+            return self._analyze_query(query, self._process_filters(filters or {}))
+            
+        # Hand out a copy so callers can't mutate the cached result
+        return replace(
+            search_query,
+            entities=[dict(entity) for entity in search_query.entities],
+            expanded_terms=list(search_query.expanded_terms),
+            filters=dict(search_query.filters)
+        )
+        
+    def _preprocess_uncached(self, query: str, filters_key: frozenset) -> SearchQuery:
+        """Preprocess a query whose filters are given as a hashable key."""
+        return self._analyze_query(query, self._process_filters(dict(filters_key)))
+        
+    def cache_info(self):
+        """Return hit/miss statistics for the preprocessing cache."""
+        return self._preprocess_cached.cache_info()
+        
+    def preprocess_batch(self, queries: List[str], 
+                         filters: Optional[Dict[str, Any]] = None) -> List[SearchQuery]:
+        """Preprocess several queries that share the same filters."""
+        # Filters are validated once for the whole batch
+        processed_filters = self._process_filters(filters or {})
+        return [self._analyze_query(query, dict(processed_filters)) for query in queries]
+        
+    def _analyze_query(self, query: str, processed_filters: Dict[str, Any]) -> SearchQuery:
+        """Analyze a single query against already-processed filters."""
         # Clean and normalize
         cleaned_query = self.text_processor.clean_text(query)
         
@@ -123,9 +174,6 @@ class QueryPreprocessor:
         # Expand terms with synonyms
         expanded_terms = self._expand_query_terms(cleaned_query)
         
-        # Process filters
-        processed_filters = self._process_filters(filters or {})
-        
         # Calculate confidence
         confidence = self._calculate_confidence(intent, entities, expanded_terms)
         
@@ -146,11 +194,12 @@ class QueryPreprocessor:
         
         for intent, patterns in self.intent_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, query_lower, re.IGNORECASE)
+                matches = pattern.findall(query_lower)
                 intent_scores[intent] += len(matches)
         
-        # Default to general if no clear intent
-        if not intent_scores:
+        # Default to general if no clear intent; every intent has an
+        # entry, so check the scores rather than the keys
+        if not any(intent_scores.values()):
             return 'general'
             
         # Return intent with highest score
@@ -163,7 +212,7 @@ class QueryPreprocessor:
         
         for entity_type, patterns in self.entity_patterns.items():
             for pattern in patterns:
-                matches = re.finditer(pattern, query_lower, re.IGNORECASE)
+                matches = pattern.finditer(query_lower)
                 for match in matches:
                     entities.append({
                         'type': entity_type,
@@ -184,8 +233,9 @@ class QueryPreprocessor:
         
         for term in terms:
             if len(term) > 3:  # Only expand meaningful terms
-                # Get synonyms
-                synonyms = self.text_processor.expand_synonyms(term)
+                # Get synonyms; prefix matching also covers plurals and
+                # partially typed terms such as "printers" or "passwo"
+                synonyms = self.text_processor.expand_synonyms([term], match_prefixes=True)
                 expanded_terms.extend(synonyms)
                 
                 # Get related terms (stems)
@@ -506,7 +556,7 @@ class SearchResultProcessor:
         for field, highlights_list in highlights.items():
             for highlight in highlights_list:
                 # Extract terms from highlighted text
-                highlighted_terms = re.findall(r'<em>(.*?)</em>', highlight)
+                highlighted_terms = _HIGHLIGHT_RE.findall(highlight)
                 matched_terms.update(highlighted_terms)
                 
         # Add original query terms if no highlights
@@ -525,7 +575,7 @@ class SearchResultProcessor:
         if 'content' in highlights:
             for highlight in highlights['content'][:3]:  # Max 3 snippets
                 # Clean HTML tags and limit length
-                clean_snippet = re.sub(r'<em>(.*?)</em>', r'**\1**', highlight)
+                clean_snippet = _HIGHLIGHT_RE.sub(r'**\1**', highlight)
                 if len(clean_snippet) > 200:
                     clean_snippet = clean_snippet[:200] + '...'
                 snippets.append(clean_snippet)
@@ -613,12 +663,69 @@ class SearchResultProcessor:
         return processed
 
 
+# Live SearchAnalytics instances, flushed by one hook at interpreter exit.
+# Held weakly so the hook doesn't keep discarded instances alive
+_ANALYTICS_INSTANCES = weakref.WeakSet()
+# How long interpreter exit waits for each instance's queued docs
+ANALYTICS_EXIT_FLUSH_TIMEOUT = 5.0
+# Queued to wake the writer thread once its SearchAnalytics is collected
+_STOP_WRITER = object()
+# Queued actions with this _op_type run as update-by-query, not through bulk
+_UPDATE_BY_QUERY = 'update_by_query'
+
+
+def _flush_all_analytics():
+    """Write out what live SearchAnalytics instances still have queued, within a bound."""
+    for analytics in list(_ANALYTICS_INSTANCES):
+        if not analytics.flush(timeout=ANALYTICS_EXIT_FLUSH_TIMEOUT):
+            logging.warning("Timed out writing queued search analytics at exit")
+
+
+atexit.register(_flush_all_analytics)
+
+
+def _stop_writer(work_queue: queue.Queue):
+    """Ask a writer thread to exit; a full queue wakes it anyway."""
+    try:
+        work_queue.put_nowait(_STOP_WRITER)
+    except queue.Full:
+        pass
+
+
+def _run_analytics_writer(analytics_ref: weakref.ref, work_queue: queue.Queue):
+    """Writer thread loop; holds its SearchAnalytics only while writing a batch."""
+    while True:
+        action = work_queue.get()
+        analytics = analytics_ref()
+        if action is _STOP_WRITER or analytics is None:
+            work_queue.task_done()
+            return
+        analytics._write_batch(action)
+        # Drop the reference between batches so the instance can be collected
+        del analytics
+
+
 class SearchAnalytics:
     """Tracks and analyzes search behavior."""
     
-    def __init__(self, es_client: Elasticsearch, analytics_index: str = "search_analytics"):
+    def __init__(self, es_client: Elasticsearch, analytics_index: str = "search_analytics",
+                 batch_size: int = 500, batch_wait: float = 0.1, max_queue_size: int = 10000):
         self.es_client = es_client
         self.analytics_index = analytics_index
+        # Reads go through an alias so the index can be rolled over transparently
+        self.read_alias = f"{analytics_index}_read"
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        
+        # Search tracking is written off the request path in bulk batches.
+        # The queue is bounded so a slow cluster can't grow memory without
+        # limit; docs that don't fit are dropped and counted
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped_count = 0
+        self._reported_drops = 0
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        
         self._ensure_analytics_index()
         
     def _ensure_analytics_index(self):
@@ -626,6 +733,13 @@ class SearchAnalytics:
         try:
             if not self.es_client.indices.exists(index=self.analytics_index):
                 mapping = {
+                    # Write-heavy index: refresh rarely and skip replicas
+                    'settings': {
+                        'index': {
+                            'refresh_interval': '30s',
+                            'number_of_replicas': 0
+                        }
+                    },
                     'mappings': {
                         'properties': {
                             'query': {'type': 'text'},
@@ -644,10 +758,18 @@ class SearchAnalytics:
         except Exception as e:
             logging.warning(f"Failed to create analytics index: {e}")
             
+        # Checked separately so indices created before the alias existed get it too
+        try:
+            if not self.es_client.indices.exists_alias(name=self.read_alias):
+                self.es_client.indices.put_alias(index=self.analytics_index, name=self.read_alias)
+        except Exception as e:
+            logging.warning(f"Failed to create analytics read alias: {e}")
+            
     def track_search(self, search_query: SearchQuery, result_count: int, 
-                    processing_time: float, filters_used: List[str]):
-        """Track a search query."""
+                    processing_time: float, filters_used: List[str]) -> Optional[str]:
+        """Track a search query and return the ID of its analytics doc."""
         try:
+            search_id = uuid.uuid4().hex
             analytics_doc = {
                 'query': search_query.original_query,
                 'timestamp': datetime.now().isoformat(),
@@ -661,54 +783,148 @@ class SearchAnalytics:
                 'processing_time': processing_time
             }
             
-            self.es_client.index(
-                index=self.analytics_index,
-                body=analytics_doc
-            )
+            self._ensure_worker()
+            self._enqueue({'_index': self.analytics_index, '_id': search_id, '_source': analytics_doc})
+            return search_id
             
         except Exception as e:
             logging.error(f"Failed to track search: {e}")
+            return None
             
-    def track_click_through(self, query: str, article_id: str, time_spent: Optional[float] = None):
-        """Track when a user clicks on a search result."""
+    def _enqueue(self, action: Dict[str, Any]):
+        """Queue a bulk action for the writer thread, dropping it if the queue is full."""
         try:
-            # Find the most recent search for this query
-            search_query = {
-                'query': {
-                    'bool': {
-                        'must': [
-                            {'match': {'query': query}},
-                            {'term': {'click_through': False}}
-                        ]
-                    }
-                },
-                'sort': [{'timestamp': {'order': 'desc'}}],
-                'size': 1
-            }
+            self._queue.put_nowait(action)
+        except queue.Full:
+            with self._worker_lock:
+                self.dropped_count += 1
             
-            response = self.es_client.search(
-                index=self.analytics_index,
-                body=search_query
-            )
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every tracked search has been written to Elasticsearch.
+        
+        Returns False if the queue was not drained within timeout seconds.
+        """
+        if self._worker is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Queue.join() with a deadline
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
             
-            if response['hits']['hits']:
-                hit = response['hits']['hits'][0]
-                # Update the document
-                self.es_client.update(
-                    index=self.analytics_index,
-                    id=hit['_id'],
-                    body={
-                        'doc': {
-                            'click_through': True,
-                            'time_spent': time_spent,
-                            'clicked_article': article_id
-                        }
-                    }
-                )
+    def _ensure_worker(self):
+        """Start the background writer thread on first use."""
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    # The thread gets a weak reference, so it doesn't keep
+                    # this instance alive; collecting it stops the thread
+                    self._worker = threading.Thread(
+                        target=_run_analytics_writer, args=(weakref.ref(self), self._queue),
+                        name="search-analytics-writer", daemon=True
+                    )
+                    self._worker.start()
+                    weakref.finalize(self, _stop_writer, self._queue)
+                    # The writer is a daemon thread; the exit hook writes
+                    # what is still queued
+                    _ANALYTICS_INSTANCES.add(self)
+                    
+    def _write_batch(self, first_action: Dict[str, Any]):
+        """Collect queued analytics docs into one batch and bulk index it."""
+        batch = [first_action]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
                 
+        dropped = self.dropped_count
+        if dropped > self._reported_drops:
+            logging.warning(f"Dropped {dropped - self._reported_drops} search analytics docs "
+                            f"while the queue was full")
+            self._reported_drops = dropped
+            
+        bulk_actions = [action for action in batch if action.get('_op_type') != _UPDATE_BY_QUERY]
+        try:
+            # One request per batch from this thread; batches are already
+            # sized, so a thread pool per batch would only add overhead
+            if bulk_actions:
+                _, errors = helpers.bulk(self.es_client, bulk_actions, chunk_size=self.batch_size,
+                                         raise_on_error=False)
+                for error in errors:
+                    logging.error(f"Failed to write search analytics doc: {error}")
+        except Exception as e:
+            logging.error(f"Failed to write search analytics batch: {e}")
+            
+        try:
+            for action in batch:
+                if action.get('_op_type') == _UPDATE_BY_QUERY:
+                    self._run_update_by_query(action)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+                
+    def _run_update_by_query(self, action: Dict[str, Any]):
+        """Apply a queued click-through update that has no analytics doc ID."""
+        try:
+            self.es_client.update_by_query(
+                index=self.read_alias,
+                body={'query': action['query'], 'script': action['script'], 'max_docs': 1},
+                conflicts='proceed'
+            )
         except Exception as e:
             logging.error(f"Failed to track click-through: {e}")
             
+    def track_click_through(self, query: str, article_id: str, time_spent: Optional[float] = None,
+                            search_id: Optional[str] = None):
+        """Track when a user clicks on a search result."""
+        click_doc = {
+            'click_through': True,
+            'time_spent': time_spent,
+            'clicked_article': article_id
+        }
+        
+        if search_id:
+            # Queued behind the search's own index action, so the update is
+            # applied after the doc is written without waiting for a refresh
+            self._ensure_worker()
+            self._enqueue({
+                '_op_type': 'update',
+                '_index': self.analytics_index,
+                '_id': search_id,
+                'doc': click_doc
+            })
+            return
+            
+        # Without an ID, the writer thread marks one unclicked search for this
+        # query by update-by-query, so the request never waits on a flush or
+        # refresh. Searches newer than the index's refresh interval aren't
+        # visible to it yet; pass search_id for exact attribution
+        self._ensure_worker()
+        self._enqueue({
+            '_op_type': _UPDATE_BY_QUERY,
+            'query': {
+                'bool': {
+                    'must': [
+                        {'match': {'query': query}},
+                        {'term': {'click_through': False}}
+                    ]
+                }
+            },
+            'script': {
+                'source': 'ctx._source.putAll(params.doc)',
+                'params': {'doc': click_doc}
+            }
+        })
+            
     def get_search_analytics(self, days: int = 30) -> Dict[str, Any]:
         """Get search analytics for the specified period."""
         try:
@@ -754,7 +970,7 @@ class SearchAnalytics:
             }
             
             response = self.es_client.search(
-                index=self.analytics_index,
+                index=self.read_alias,
                 body=analytics_query,
                 size=0
             )
@@ -844,10 +1060,55 @@ class IntelligentSearchSystem:
         # Track analytics
         processing_time = (datetime.now() - start_time).total_seconds()
         filters_used = list(filters.keys()) if filters else []
-        self.analytics.track_search(search_query, len(results), processing_time, filters_used)
+        metadata['search_id'] = self.analytics.track_search(search_query, len(results),
+                                                            processing_time, filters_used)
         
         return results, metadata, search_query
         
+    def search_batch(self, queries: List[str], filters: Optional[Dict[str, Any]] = None,
+                     size: int = 20) -> List[Tuple[List[SearchResult], Dict[str, Any], SearchQuery]]:
+        """Perform several intelligent searches in a single multi-search request."""
+        start_time = datetime.now()
+        
+        # Preprocess all queries together
+        search_queries = self.preprocessor.preprocess_batch(queries, filters)
+        
+        # One header/body pair per query in the msearch payload
+        msearch_body = []
+        for search_query in search_queries:
+            es_query = self.query_builder.build_search_query(search_query, size)
+            msearch_body.append({'index': self.index_name})
+            msearch_body.append(es_query.to_dict())
+        
+        # Execute all searches in one round-trip
+        try:
+            msearch_response = self.es_client.msearch(body=msearch_body)
+            responses = msearch_response.get('responses', [])
+        except Exception as e:
+            logging.error(f"Batch search execution failed: {e}")
+            return [([], {}, search_query) for search_query in search_queries]
+        
+        # Process results
+        batch_results = []
+        processing_time = (datetime.now() - start_time).total_seconds()
+        filters_used = list(filters.keys()) if filters else []
+        
+        # A truncated msearch reply must not silently drop the trailing queries
+        missing = {'error': 'no response returned for this query'}
+        for index, (query, search_query) in enumerate(zip(queries, search_queries)):
+            response_dict = responses[index] if index < len(responses) else missing
+            if 'error' in response_dict:
+                logging.error(f"Search execution failed for '{query}': {response_dict['error']}")
+                batch_results.append(([], {}, search_query))
+                continue
+                
+            results, metadata = self.result_processor.process_search_results(response_dict, query)
+            metadata['search_id'] = self.analytics.track_search(search_query, len(results),
+                                                                processing_time, filters_used)
+            batch_results.append((results, metadata, search_query))
+        
+        return batch_results
+        
     def get_search_suggestions(self, partial_query: str) -> List[str]:
         """Get search suggestions for partial queries."""
         try:
@@ -917,9 +1178,10 @@ class IntelligentSearchSystem:
         """Get comprehensive search analytics."""
         return self.analytics.get_search_analytics(days)
         
-    def track_click_through(self, query: str, article_id: str, time_spent: Optional[float] = None):
-        """Track when a user clicks on a search result."""
-        self.analytics.track_click_through(query, article_id, time_spent)
+    def track_click_through(self, query: str, article_id: str, time_spent: Optional[float] = None,
+                            search_id: Optional[str] = None):
+        """Track a click on a search result; pass the search_id from the search metadata."""
+        self.analytics.track_click_through(query, article_id, time_spent, search_id)
 
 
 def main():
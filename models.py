@@ -69,6 +69,8 @@ class SolutionStep(BaseModel):
         return v.strip()
     
     class Config:
+        # Steps are shared between articles and sessions; copy to change them
+        frozen = True
         schema_extra = {
             "example": {
                 "order": 1,
@@ -216,6 +218,8 @@ class KnowledgeArticle(BaseModel):
         return self.content[:max_length].rsplit(' ', 1)[0] + '...'
     
     class Config:
+        # Articles are shared read-only fixtures and cache entries; copy to change them
+        frozen = True
         schema_extra = {
             "example": {
                 "article_id": 1,
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Dashboard Statistics Refresher
+Periodically precomputes the admin dashboard statistics into a small
+Elasticsearch document so the Streamlit dashboard can read it in one GET.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from helpdesk_elasticsearch import HelpdeskElasticsearchManager, DASHBOARD_STATS_INDEX
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Precompute dashboard statistics for the admin interface"
+    )
+    parser.add_argument("--host", default="localhost", help="Elasticsearch host")
+    parser.add_argument("--port", type=int, default=9200, help="Elasticsearch port")
+    parser.add_argument("--index", default="helpdesk_kb", help="Article index name")
+    parser.add_argument("--stats-index", default=DASHBOARD_STATS_INDEX,
+                        help="Index holding the statistics document")
+    parser.add_argument("--interval", type=int, default=60,
+                        help="Seconds between refreshes")
+    parser.add_argument("--once", action="store_true",
+                        help="Refresh once and exit (e.g. when run from cron)")
+    
+    args = parser.parse_args()
+    
+    try:
+        manager = HelpdeskElasticsearchManager(
+            host=args.host,
+            port=args.port,
+            index_name=args.index
+        )
+    except Exception as e:
+        logger.error(f"Could not connect to Elasticsearch: {e}")
+        sys.exit(1)
+    
+    exit_code = 0
+    try:
+        while True:
+            refreshed = manager.refresh_dashboard_stats(stats_index=args.stats_index)
+            if args.once:
+                # Let cron and other schedulers see a failed refresh
+                exit_code = 0 if refreshed else 1
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        logger.info("Dashboard statistics refresher stopped")
+    finally:
+        manager.close()
+    
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,18 @@ Provides intelligent response formatting, template management, and conversation
 
 import re
 import json
+import heapq
+import functools
 import random
+import itertools
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union, Tuple
+from typing import Dict, List, Optional, Any, Union, Tuple, Callable, FrozenSet, Deque
 from enum import Enum
 from dataclasses import dataclass, field
+from collections import deque, ChainMap
 from abc import ABC, abstractmethod
-import textstat
-from jinja2 import Template, Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from models import (
     KnowledgeArticle, SolutionStep, DiagnosticQuestion,
@@ -24,6 +27,52 @@ from models import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Readability counting, compiled once
+_WORD_RE = re.compile(r"\b[\w']+\b")
+_SENT_RE = re.compile(r"[.!?]+")
+_SYL_RE = re.compile(r"[aeiouy]+", re.IGNORECASE)
+
+
+def _substitution_pattern(terms: Dict[str, str], whole_words: bool = True, flags: int = 0) -> re.Pattern:
+    """Compile one alternation matching every key of a substitution table."""
+    # Longest first so a term isn't shadowed by one of its prefixes
+    alternation = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf'\b(?:{alternation})\b' if whole_words else alternation, flags)
+
+
+# Plain-language replacements applied to content for beginners
+_BEGINNER_TERMS = {
+    'configure': 'set up', 'configuration': 'set up',
+    'execute': 'run', 'execution': 'run',
+    'terminate': 'stop', 'termination': 'stop',
+    'initialize': 'start', 'initialization': 'start'
+}
+_BEGINNER_RE = _substitution_pattern(_BEGINNER_TERMS, flags=re.IGNORECASE)
+
+# Extra detail appended to content for experts
+_EXPERT_TERMS = {
+    'restart': 'restart (systemctl restart or service restart)',
+    'check the logs': 'check the logs (/var/log/ or Event Viewer)'
+}
+_EXPERT_RE = _substitution_pattern(_EXPERT_TERMS, whole_words=False)
+
+# Simplifications used when optimizing a response for beginners
+_OPTIMIZE_BEGINNER_TERMS = {
+    'configure': 'set up',
+    'execute': 'run',
+    'parameter': 'setting',
+    'interface': 'screen',
+    'protocol': 'method'
+}
+_OPTIMIZE_BEGINNER_RE = _substitution_pattern(_OPTIMIZE_BEGINNER_TERMS, flags=re.IGNORECASE)
+
+# Phrasing swaps used when optimizing a response for a friendly tone
+_FRIENDLY_TERMS = {
+    'Please': 'Feel free to',
+    'You must': "You'll want to"
+}
+_FRIENDLY_RE = _substitution_pattern(_FRIENDLY_TERMS, whole_words=False)
+
 
 class ResponseType(str, Enum):
     """Types of responses the system can generate."""
@@ -55,6 +104,33 @@ class ConversationState(str, Enum):
     ESCALATED = "escalated"
 
 
+class SuggestionCode(str, Enum):
+    """Improvement suggestions produced by the quality analyzer."""
+    SIMPLIFY_LANGUAGE = "simplify_language"
+    ADD_DETAIL = "add_detail"
+    RESPONSE_TOO_SHORT = "response_too_short"
+    RESPONSE_TOO_LONG = "response_too_long"
+    ADD_PARAGRAPHS = "add_paragraphs"
+    ADD_FORMATTING = "add_formatting"
+    CLARIFY_TONE = "clarify_tone"
+    
+    @property
+    def description(self) -> str:
+        """Human-readable message; length codes take a {word_count} field."""
+        return _SUGGESTION_MESSAGES[self]
+
+
+_SUGGESTION_MESSAGES = {
+    SuggestionCode.SIMPLIFY_LANGUAGE: "Simplify language - the text is too complex",
+    SuggestionCode.ADD_DETAIL: "Consider adding more detail - the text might be too simple",
+    SuggestionCode.RESPONSE_TOO_SHORT: "Response is too short ({word_count} words). Add more detail.",
+    SuggestionCode.RESPONSE_TOO_LONG: "Response is too long ({word_count} words). Consider breaking it up.",
+    SuggestionCode.ADD_PARAGRAPHS: "Add paragraph breaks for better readability",
+    SuggestionCode.ADD_FORMATTING: "Consider using formatting (headers, lists) for better structure",
+    SuggestionCode.CLARIFY_TONE: "Establish a clearer tone (professional, friendly, or empathetic)"
+}
+
+
 @dataclass
 class ResponseContext:
     """Context information for generating responses."""
@@ -141,14 +217,10 @@ class BaseResponseFormatter(ABC):
         """Adjust the technical level of the content."""
         if level == TechnicalLevel.BEGINNER:
             # Simplify technical terms
-            content = re.sub(r'\b(configure|configuration)\b', 'set up', content, flags=re.IGNORECASE)
-            content = re.sub(r'\b(execute|execution)\b', 'run', content, flags=re.IGNORECASE)
-            content = re.sub(r'\b(terminate|termination)\b', 'stop', content, flags=re.IGNORECASE)
-            content = re.sub(r'\b(initialize|initialization)\b', 'start', content, flags=re.IGNORECASE)
+            content = _BEGINNER_RE.sub(lambda m: _BEGINNER_TERMS[m.group().lower()], content)
         elif level == TechnicalLevel.EXPERT:
             # Add technical details (in practice, would be more sophisticated)
-            content = content.replace('restart', 'restart (systemctl restart or service restart)')
-            content = content.replace('check the logs', 'check the logs (/var/log/ or Event Viewer)')
+            content = _EXPERT_RE.sub(lambda m: _EXPERT_TERMS[m.group()], content)
         
         return content
 
@@ -370,6 +442,24 @@ class EscalationResponseFormatter(BaseResponseFormatter):
         return "\n".join(response_parts)
 
 
+_FALLBACK_TEMPLATE = """
+{greeting}
+
+{acknowledgment}
+
+{solution_content}
+
+{closing}
+"""
+
+
+class _TemplateDefaults(dict):
+    """Default template variables; unknown placeholders are left as written."""
+    
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
 class TemplateEngine:
     """Manages dynamic templates for response generation."""
     
@@ -381,6 +471,13 @@ class TemplateEngine:
             loader=FileSystemLoader(self.template_dir) if template_dir else None,
             autoescape=select_autoescape(['html', 'xml'])
         )
+        # Templates are static, so resolve the (category, type) lookup once
+        self._compiled: Dict[Tuple[str, str], Callable[[Any], str]] = {
+            (category, template_type): template_str.format_map
+            for category, templates in self.templates.items()
+            for template_type, template_str in templates.items()
+        }
+        self._fallback = _FALLBACK_TEMPLATE.format_map
     
     def _load_templates(self) -> Dict[str, Dict[str, str]]:
         """Load response templates organized by category and type."""
@@ -475,48 +572,34 @@ Let's update {software_name} to the latest version. {acknowledgment}
                        variables: Dict[str, Any],
                        context: ResponseContext) -> str:
         """Render a template with the given variables and context."""
-        # Get the appropriate template
-        template_str = self.templates.get(category, {}).get(template_type)
-        
-        if not template_str:
-            # Fallback to a generic template
-            template_str = """
-{greeting}
-
-{acknowledgment}
-
-{solution_content}
-
-{closing}
-            """
-        
-        # Prepare variables
-        template_vars = {
-            'user_name': context.user_name or 'there',
-            'greeting': f"Hello {context.user_name or 'there'}",
-            'acknowledgment': "I understand your concern.",
-            'closing': "Let me know if you need further assistance!",
-            'software_version': context.software_version or 'your version',
-            'time_estimate': '10-15',
-            **variables
-        }
+        render = self._compiled.get((category, template_type), self._fallback)
+        
+        # Caller variables take precedence over the context defaults
+        defaults = _TemplateDefaults(
+            user_name=context.user_name or 'there',
+            greeting=f"Hello {context.user_name or 'there'}",
+            acknowledgment="I understand your concern.",
+            closing="Let me know if you need further assistance!",
+            software_version=context.software_version or 'your version',
+            time_estimate='10-15'
+        )
         
-        # Render the template
-        template = Template(template_str)
-        return template.render(**template_vars).strip()
+        return render(ChainMap(variables, defaults)).strip()
     
     def add_conditional_content(self,
                                base_content: str,
                                conditions: Dict[str, bool],
                                conditional_content: Dict[str, str]) -> str:
         """Add conditional content based on user responses or context."""
-        result = base_content
-        
-        for condition_key, is_true in conditions.items():
-            if is_true and condition_key in conditional_content:
-                result += f"\n\n{conditional_content[condition_key]}"
+        active = [
+            conditional_content[condition_key]
+            for condition_key, is_true in conditions.items()
+            if is_true and condition_key in conditional_content
+        ]
         
-        return result
+        if not active:
+            return base_content
+        return "\n\n".join([base_content, *active])
 
 
 class SolutionStepManager:
@@ -942,11 +1025,17 @@ class DiagnosticSession:
 class ConversationContextManager:
     """Manages conversation context and history."""
     
-    def __init__(self, session_timeout_minutes: int = 30):
+    def __init__(self,
+                 session_timeout_minutes: int = 30,
+                 time_fn: Callable[[], datetime] = datetime.now):
         """Initialize the conversation context manager."""
         self.sessions: Dict[str, 'ConversationSession'] = {}
         self.session_timeout = timedelta(minutes=session_timeout_minutes)
         self.user_profiles: Dict[str, 'UserProfile'] = {}
+        self._time_fn = time_fn
+        # Min-heap of (expiry time, session id), pushed on every activity.
+        # Entries go stale when a session is active again; cleanup re-checks.
+        self._expiry_heap: List[Tuple[datetime, str]] = []
     
     def start_session(self,
                      session_id: str,
@@ -961,13 +1050,16 @@ class ConversationContextManager:
                 self.user_profiles[user_id] = profile
         
         # Create new session
+        now = self._time_fn()
         session = ConversationSession(
             session_id=session_id,
             user_profile=profile,
-            started_at=datetime.now()
+            started_at=now,
+            last_activity=now
         )
         
         self.sessions[session_id] = session
+        heapq.heappush(self._expiry_heap, (now + self.session_timeout, session_id))
         return session
     
     def add_turn(self,
@@ -980,15 +1072,17 @@ class ConversationContextManager:
         if not session:
             return False
         
+        now = self._time_fn()
         turn = ConversationTurn(
-            timestamp=datetime.now(),
+            timestamp=now,
             speaker=speaker,
             message=message,
             **metadata
         )
         
         session.turns.append(turn)
-        session.last_activity = datetime.now()
+        session.last_activity = now
+        heapq.heappush(self._expiry_heap, (now + self.session_timeout, session_id))
         
         # Update context based on the turn
         self._update_context(session, turn)
@@ -1040,9 +1134,13 @@ class ConversationContextManager:
         if not session:
             return []
         
-        if last_n_turns:
-            return session.turns[-last_n_turns:]
-        return session.turns
+        if last_n_turns and last_n_turns > 0:
+            # Walk back from the newest turn; slicing a deque from an offset
+            # would step through every older turn first
+            recent = list(itertools.islice(reversed(session.turns), last_n_turns))
+            recent.reverse()
+            return recent
+        return list(session.turns)
     
     def should_escalate(self, session_id: str) -> Tuple[bool, str]:
         """Determine if the conversation should be escalated."""
@@ -1061,7 +1159,7 @@ class ConversationContextManager:
             return True, "already_escalated"
         
         # Check conversation duration
-        duration = datetime.now() - session.started_at
+        duration = self._time_fn() - session.started_at
         if duration > timedelta(minutes=20) and session.state != ConversationState.COMPLETED:
             return True, "complex_issue"
         
@@ -1069,18 +1167,19 @@ class ConversationContextManager:
     
     def cleanup_expired_sessions(self):
         """Remove expired sessions."""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, session in self.sessions.items():
-            if current_time - session.last_activity > self.session_timeout:
-                expired_sessions.append(session_id)
-        
-        for session_id in expired_sessions:
-            self._save_session_history(self.sessions[session_id])
-            del self.sessions[session_id]
-        
-        return len(expired_sessions)
+        current_time = self._time_fn()
+        expired_count = 0
+        
+        # Only sessions whose last recorded expiry has passed are examined
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            session = self.sessions.get(session_id)
+            if session and current_time - session.last_activity > self.session_timeout:
+                self._save_session_history(session)
+                del self.sessions[session_id]
+                expired_count += 1
+        
+        return expired_count
     
     def _save_session_history(self, session: 'ConversationSession'):
         """Save session history for future reference."""
@@ -1119,6 +1218,10 @@ class ConversationContextManager:
         profile.preferences.update(preferences)
 
 
+# Oldest turns are dropped once a session holds this many
+MAX_HISTORY_TURNS = 1000
+
+
 @dataclass
 class ConversationSession:
     """Represents a conversation session."""
@@ -1126,7 +1229,7 @@ class ConversationSession:
     started_at: datetime
     user_profile: Optional['UserProfile'] = None
     context: ResponseContext = field(default_factory=ResponseContext)
-    turns: List[ConversationTurn] = field(default_factory=list)
+    turns: Deque[ConversationTurn] = field(default_factory=lambda: deque(maxlen=MAX_HISTORY_TURNS))
     state: ConversationState = ConversationState.INITIAL
     last_activity: datetime = field(default_factory=datetime.now)
     failed_solution_attempts: int = 0
@@ -1147,11 +1250,22 @@ class UserProfile:
 class ResponseQualityAnalyzer:
     """Analyzes and optimizes response quality."""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 256):
         """Initialize the response quality analyzer."""
         self.target_readability_score = 60  # Flesch Reading Ease target
         self.optimal_length_range = (50, 300)  # words
         self.tone_keywords = self._load_tone_keywords()
+        # Terms are matched as substrings, so inflected and compound forms
+        # ('assistance', 'parameters') count toward the base term
+        self.technical_terms = ('configuration', 'parameter', 'protocol', 'interface',
+                                'registry', 'terminal', 'command', 'syntax')
+        self.simple_terms = ('click', 'button', 'screen', 'icon', 'menu', 'window')
+        
+        # Greetings, clarifications and re-rendered responses repeat across
+        # sessions, so the same text is often scored and optimized again
+        self._suggestions_cached = functools.lru_cache(maxsize=cache_size)(self._generate_suggestions_uncached)
+        self._optimize_cached = functools.lru_cache(maxsize=cache_size)(self._optimize_response_uncached)
+        self._analysis_cached = functools.lru_cache(maxsize=cache_size)(self._analyze_response_uncached)
     
     def _load_tone_keywords(self) -> Dict[str, List[str]]:
         """Load keywords for tone analysis."""
@@ -1165,6 +1279,16 @@ class ResponseQualityAnalyzer:
     
     def analyze_response(self, response: str) -> Dict[str, Any]:
         """Analyze response quality metrics."""
+        metrics = self._analysis_cached(response)
+        # Hand out fresh containers so callers can't alter the cached entry
+        return {
+            **metrics,
+            'tone': dict(metrics['tone']),
+            'suggestions': list(metrics['suggestions'])
+        }
+    
+    def _analyze_response_uncached(self, response: str) -> Dict[str, Any]:
+        """Analyze a response not yet in the cache."""
         return {
             'readability_score': self.calculate_readability(response),
             'length_words': len(response.split()),
@@ -1176,10 +1300,17 @@ class ResponseQualityAnalyzer:
     
     def calculate_readability(self, text: str) -> float:
         """Calculate Flesch Reading Ease score."""
-        try:
-            return textstat.flesch_reading_ease(text)
-        except:
+        words = _WORD_RE.findall(text)
+        if not words:
             return 0.0
+        
+        sentences = max(1, len(_SENT_RE.findall(text)))
+        # Each vowel group is a syllable; every word has at least one
+        syllables = sum(max(1, len(_SYL_RE.findall(word))) for word in words)
+        
+        return (206.835
+                - 1.015 * (len(words) / sentences)
+                - 84.6 * (syllables / len(words)))
     
     def analyze_tone(self, text: str) -> Dict[str, float]:
         """Analyze the tone of the response."""
@@ -1199,13 +1330,9 @@ class ResponseQualityAnalyzer:
     
     def assess_technical_level(self, text: str) -> TechnicalLevel:
         """Assess the technical level of the response."""
-        technical_terms = ['configuration', 'parameter', 'protocol', 'interface', 
-                          'registry', 'terminal', 'command', 'syntax']
-        simple_terms = ['click', 'button', 'screen', 'icon', 'menu', 'window']
-        
         text_lower = text.lower()
-        technical_count = sum(1 for term in technical_terms if term in text_lower)
-        simple_count = sum(1 for term in simple_terms if term in text_lower)
+        technical_count = sum(1 for term in self.technical_terms if term in text_lower)
+        simple_count = sum(1 for term in self.simple_terms if term in text_lower)
         
         if technical_count > simple_count * 2:
             return TechnicalLevel.EXPERT
@@ -1258,41 +1385,60 @@ class ResponseQualityAnalyzer:
     
     def generate_suggestions(self, response: str) -> List[str]:
         """Generate improvement suggestions for the response."""
+        word_count = len(response.split())
+        return [
+            code.description.format(word_count=word_count)
+            for code in self._suggestions_cached(response)
+        ]
+    
+    def suggestion_codes(self, response: str) -> FrozenSet['SuggestionCode']:
+        """Return the structured codes behind generate_suggestions."""
+        return frozenset(self._suggestions_cached(response))
+    
+    def _generate_suggestions_uncached(self, response: str) -> Tuple['SuggestionCode', ...]:
+        """Generate suggestion codes for a response not yet in the cache."""
         suggestions = []
         
         # Check readability
         readability = self.calculate_readability(response)
         if readability < 30:
-            suggestions.append("Simplify language - the text is too complex")
+            suggestions.append(SuggestionCode.SIMPLIFY_LANGUAGE)
         elif readability > 80:
-            suggestions.append("Consider adding more detail - the text might be too simple")
+            suggestions.append(SuggestionCode.ADD_DETAIL)
         
         # Check length
         word_count = len(response.split())
         if word_count < self.optimal_length_range[0]:
-            suggestions.append(f"Response is too short ({word_count} words). Add more detail.")
+            suggestions.append(SuggestionCode.RESPONSE_TOO_SHORT)
         elif word_count > self.optimal_length_range[1]:
-            suggestions.append(f"Response is too long ({word_count} words). Consider breaking it up.")
+            suggestions.append(SuggestionCode.RESPONSE_TOO_LONG)
         
         # Check structure
         if '\n' not in response and word_count > 50:
-            suggestions.append("Add paragraph breaks for better readability")
+            suggestions.append(SuggestionCode.ADD_PARAGRAPHS)
         
         if not any(marker in response for marker in ['**', '##', '•', '-', '1.']):
-            suggestions.append("Consider using formatting (headers, lists) for better structure")
+            suggestions.append(SuggestionCode.ADD_FORMATTING)
         
         # Check tone
         tone_scores = self.analyze_tone(response)
         if not any(score > 0.3 for score in tone_scores.values()):
-            suggestions.append("Establish a clearer tone (professional, friendly, or empathetic)")
+            suggestions.append(SuggestionCode.CLARIFY_TONE)
         
-        return suggestions
+        return tuple(suggestions)
     
     def optimize_response(self,
                          response: str,
                          target_level: TechnicalLevel,
                          target_tone: str = "professional") -> str:
         """Optimize response for target technical level and tone."""
+        return self._optimize_cached(response, target_level, target_tone)
+    
+    def _optimize_response_uncached(self,
+                                    response: str,
+                                    target_level: TechnicalLevel,
+                                    target_tone: str) -> str:
+        """Optimize a response whose arguments are not yet in the cache."""
         optimized = response
         
         # Adjust technical level
@@ -1300,15 +1446,9 @@ class ResponseQualityAnalyzer:
         if current_level != target_level:
             if target_level == TechnicalLevel.BEGINNER:
                 # Simplify technical terms
-                replacements = {
-                    'configure': 'set up',
-                    'execute': 'run',
-                    'parameter': 'setting',
-                    'interface': 'screen',
-                    'protocol': 'method'
-                }
-                for old, new in replacements.items():
-                    optimized = re.sub(rf'\b{old}\b', new, optimized, flags=re.IGNORECASE)
+                optimized = _OPTIMIZE_BEGINNER_RE.sub(
+                    lambda m: _OPTIMIZE_BEGINNER_TERMS[m.group().lower()], optimized
+                )
             elif target_level == TechnicalLevel.EXPERT:
                 # Add technical details (simplified example)
                 optimized = optimized.replace('restart the service', 
@@ -1316,8 +1456,7 @@ class ResponseQualityAnalyzer:
         
         # Adjust tone
         if target_tone == "friendly":
-            optimized = optimized.replace("Please", "Feel free to")
-            optimized = optimized.replace("You must", "You'll want to")
+            optimized = _FRIENDLY_RE.sub(lambda m: _FRIENDLY_TERMS[m.group()], optimized)
         elif target_tone == "empathetic":
             if "error" in optimized.lower() or "problem" in optimized.lower():
                 optimized = "I understand this can be frustrating. " + optimized
@@ -1332,6 +1471,14 @@ class ResponseQualityAnalyzer:
                 optimized = '. '.join(sentences[:3] + ['...'] + sentences[-2:])
         
         return optimized
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Return hit/miss statistics for the analyzer's caches."""
+        return {
+            'suggestions': self._suggestions_cached.cache_info(),
+            'optimize': self._optimize_cached.cache_info(),
+            'analysis': self._analysis_cached.cache_info()
+        }
 
 
 class ResponseGenerationSystem:
@@ -1481,6 +1628,7 @@ __all__ = [
     'ResponseType',
     'TechnicalLevel',
     'ConversationState',
+    'SuggestionCode',
     'ResponseContext',
     'ArticleResponseFormatter',
     'StepByStepResponseFormatter',
@@ -6,6 +6,8 @@ Provides a web-based interface for managing helpdesk knowledge base articles.
 
 import streamlit as st
 import json
+import os
+import re
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
@@ -25,6 +27,133 @@ from json_importer import JSONImporter
 from excel_importer import ExcelImporter
 from content_validator import ContentValidator
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Splits comma-separated form input, absorbing surrounding whitespace
+_TOKEN_SPLIT = re.compile(r"\s*,\s*")
+_TOKEN_EDGES = " \t\r\n,"
+
+# Number of step/question slots rendered on the Add Article form
+MAX_SOLUTION_STEPS = 5
+MAX_DIAGNOSTIC_QUESTIONS = 3
+
+# Seconds the analytics dashboard statistics are cached between reruns
+DASHBOARD_CACHE_TTL = 15
+
+# Shared dashboard cache in Redis (enabled by setting REDIS_URL)
+DASHBOARD_REDIS_TTL = 30
+DASHBOARD_REDIS_KEY = "dashboard:stats:{index_name}"
+DASHBOARD_REDIS_HITS = "dashboard:cache_hits"
+DASHBOARD_REDIS_MISSES = "dashboard:cache_misses"
+
+
+def _parse_tokens(text: str) -> List[str]:
+    """Split a comma-separated form field into a list of non-empty tokens."""
+    if not text:
+        return []
+    return [token for token in _TOKEN_SPLIT.split(text.strip(_TOKEN_EDGES)) if token]
+
+
+@st.cache_resource
+def get_es_manager() -> HelpdeskElasticsearchManager:
+    """Return the Elasticsearch manager shared across script reruns."""
+    # The manager connects (and pings) in its constructor, so the client and
+    # its connection pool are only built once per server process.
+    return HelpdeskElasticsearchManager()
+
+
+@st.cache_resource
+def get_validator() -> ContentValidator:
+    """Return the content validator shared across script reruns."""
+    return ContentValidator()
+
+
+@st.cache_resource
+def _connect_dashboard_cache() -> Optional["redis.Redis"]:
+    """Connect to the shared Redis cache, or return None if Redis is not configured."""
+    # Connection errors propagate so that Streamlit does not cache the
+    # failure; the next call tries again
+    redis_url = os.getenv("REDIS_URL")
+    if not REDIS_AVAILABLE or not redis_url:
+        return None
+    client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+    client.ping()
+    return client
+
+
+def get_dashboard_cache() -> Optional["redis.Redis"]:
+    """Return the Redis client shared by all workers, or None if Redis is unavailable."""
+    try:
+        return _connect_dashboard_cache()
+    except redis.RedisError:
+        return None
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_dashboard_stats(_es_manager: HelpdeskElasticsearchManager,
+                         index_name: str) -> Dict[str, Any]:
+    """Return dashboard statistics for an index, cached across reruns and sessions."""
+    # The leading underscore keeps Streamlit from hashing the manager;
+    # the cache is keyed on the index name alone.
+    cache = get_dashboard_cache()
+    key = DASHBOARD_REDIS_KEY.format(index_name=index_name)
+    
+    if cache is not None:
+        try:
+            cached = cache.get(key)
+            if cached is not None:
+                cache.incr(DASHBOARD_REDIS_HITS)
+                return json.loads(cached)
+            cache.incr(DASHBOARD_REDIS_MISSES)
+        except redis.RedisError:
+            cache = None
+    
+    stats = _es_manager.get_dashboard_stats()
+    if stats is None:
+        # Fall back to a live aggregation until refresh_dashboard_stats.py has
+        # run, or when its last refresh is too old
+        stats = _es_manager.get_dashboard_aggregations()
+    
+    if cache is not None and stats:
+        try:
+            cache.setex(key, DASHBOARD_REDIS_TTL, json.dumps(stats))
+        except redis.RedisError:
+            pass
+    return stats
+
+
+def clear_dashboard_cache(index_name: str):
+    """Drop cached dashboard statistics from this process and from Redis."""
+    load_dashboard_stats.clear()
+    cache = get_dashboard_cache()
+    if cache is not None:
+        try:
+            cache.delete(DASHBOARD_REDIS_KEY.format(index_name=index_name))
+        except redis.RedisError:
+            pass
+
+
+def dashboard_cache_stats() -> Optional[Dict[str, Any]]:
+    """Return shared dashboard cache hit/miss counts, or None without Redis."""
+    cache = get_dashboard_cache()
+    if cache is None:
+        return None
+    try:
+        hits, misses = cache.mget(DASHBOARD_REDIS_HITS, DASHBOARD_REDIS_MISSES)
+    except redis.RedisError:
+        return None
+    hits, misses = int(hits or 0), int(misses or 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0.0
+    }
+
 
 class StreamlitAdmin:
     """Main Streamlit admin interface for knowledge base management."""
@@ -33,7 +162,8 @@ class StreamlitAdmin:
         self.setup_page_config()
         self.initialize_session_state()
         self.es_manager = None
-        self.validator = ContentValidator()
+        self._dashboard_aggs = None
+        self.validator = get_validator()
         self.text_processor = TextProcessor()
         
     def setup_page_config(self):
@@ -62,8 +192,7 @@ class StreamlitAdmin:
         """Connect to Elasticsearch."""
         try:
             if self.es_manager is None:
-                self.es_manager = HelpdeskElasticsearchManager()
-                self.es_manager.connect()
+                self.es_manager = get_es_manager()
             return True
         except Exception as e:
             st.error(f"Failed to connect to Elasticsearch: {e}")
@@ -163,177 +292,174 @@ class StreamlitAdmin:
                 key="content_input"
             )
             
-            # Solution Steps
+            # Solution Steps (values are read back from session state on submit)
             st.subheader("Solution Steps")
-            solution_steps = []
             
-            for i in range(5):  # Allow up to 5 steps
+            for i in range(MAX_SOLUTION_STEPS):
                 with st.expander(f"Step {i+1}", expanded=i==0):
-                    step_title = st.text_input(f"Step {i+1} Title", key=f"step_title_{i}")
-                    step_content = st.text_area(f"Step {i+1} Content", key=f"step_content_{i}")
-                    step_type = st.selectbox(
+                    st.text_input(f"Step {i+1} Title", key=f"step_title_{i}")
+                    st.text_area(f"Step {i+1} Content", key=f"step_content_{i}")
+                    st.selectbox(
                         f"Step {i+1} Type",
                         [step_type.value for step_type in SolutionStepType],
                         key=f"step_type_{i}"
                     )
-                    step_time = st.number_input(
+                    st.number_input(
                         f"Step {i+1} Time (minutes)",
                         min_value=1,
                         max_value=60,
                         value=5,
                         key=f"step_time_{i}"
                     )
-                    
-                    if step_title and step_content:
-                        solution_steps.append({
-                            "order": i + 1,
-                            "title": step_title,
-                            "content": step_content,
-                            "step_type": step_type,
-                            "estimated_time_minutes": step_time
-                        })
-            
-            # Diagnostic Questions
+            
+            # Diagnostic Questions (values are read back from session state on submit)
             st.subheader("Diagnostic Questions")
-            diagnostic_questions = []
             
-            for i in range(3):  # Allow up to 3 questions
+            for i in range(MAX_DIAGNOSTIC_QUESTIONS):
                 with st.expander(f"Question {i+1}", expanded=i==0):
-                    question_text = st.text_input(f"Question {i+1}", key=f"question_{i}")
+                    st.text_input(f"Question {i+1}", key=f"question_{i}")
                     question_type = st.selectbox(
                         f"Question {i+1} Type",
                         [qtype.value for qtype in QuestionType],
                         key=f"qtype_{i}"
                     )
-                    required = st.checkbox(f"Required", value=True, key=f"required_{i}")
+                    st.checkbox(f"Required", value=True, key=f"required_{i}")
                     
-                    options = []
                     if question_type == "multiple_choice":
-                        options_input = st.text_area(
+                        st.text_area(
                             f"Options (one per line)",
                             key=f"options_{i}"
                         )
-                        if options_input:
-                            options = [opt.strip() for opt in options_input.split('\n') if opt.strip()]
-                    
-                    if question_text:
-                        diagnostic_questions.append({
-                            "question": question_text,
-                            "question_type": question_type,
-                            "required": required,
-                            "options": options if options else []
-                        })
             
             # Preview and Submit
-            if st.form_submit_button("Preview Article"):
-                self.preview_article(
-                    title, category, subcategory, content, keywords, symptoms,
-                    difficulty, estimated_time, success_rate, is_active,
-                    solution_steps, diagnostic_questions
-                )
-                
-            if st.form_submit_button("Save Article"):
-                self.save_article(
+            preview_clicked = st.form_submit_button("Preview Article")
+            save_clicked = st.form_submit_button("Save Article")
+            
+            if preview_clicked or save_clicked:
+                article_data = self._collect_article_payload(
                     title, category, subcategory, content, keywords, symptoms,
-                    difficulty, estimated_time, success_rate, is_active,
-                    solution_steps, diagnostic_questions
+                    difficulty, estimated_time, success_rate, is_active
                 )
                 
-    def preview_article(self, title, category, subcategory, content, keywords,
-                       symptoms, difficulty, estimated_time, success_rate, is_active,
-                       solution_steps, diagnostic_questions):
-        """Preview the article before saving."""
-        st.subheader("📋 Article Preview")
-        
+                if article_data is None:
+                    st.error("Please fill in all required fields.")
+                elif preview_clicked:
+                    self.preview_article(article_data)
+                else:
+                    self.save_article(article_data)
+                    
+    def _collect_article_payload(self, title, category, subcategory, content, keywords,
+                                 symptoms, difficulty, estimated_time, success_rate, is_active):
+        """Build the article payload shared by preview and save, or None if incomplete."""
         # Validate required fields
         if not all([title, category, subcategory, content]):
-            st.error("Please fill in all required fields.")
-            return
+            return None
             
-        # Create preview
-        preview_data = {
+        now = datetime.now().isoformat()
+        return {
             "title": title,
             "category": category,
             "subcategory": subcategory,
             "content": content,
-            "keywords": [k.strip() for k in keywords.split(',') if k.strip()] if keywords else [],
-            "symptoms": [s.strip() for s in symptoms.split(',') if s.strip()] if symptoms else [],
+            "keywords": _parse_tokens(keywords),
+            "symptoms": _parse_tokens(symptoms),
             "difficulty_level": difficulty,
             "estimated_time_minutes": estimated_time,
             "success_rate": success_rate,
             "is_active": is_active,
-            "solution_steps": solution_steps,
-            "diagnostic_questions": diagnostic_questions
+            "solution_steps": self._collect_solution_steps(),
+            "diagnostic_questions": self._collect_diagnostic_questions(),
+            "created_at": now,
+            "updated_at": now
         }
         
+    def _collect_solution_steps(self):
+        """Build solution steps from the form's widget values in session state."""
+        state = st.session_state
+        return [
+            {
+                "order": i + 1,
+                "title": state[f"step_title_{i}"],
+                "content": state[f"step_content_{i}"],
+                "step_type": state[f"step_type_{i}"],
+                "estimated_time_minutes": state[f"step_time_{i}"]
+            }
+            for i in range(MAX_SOLUTION_STEPS)
+            if state.get(f"step_title_{i}") and state.get(f"step_content_{i}")
+        ]
+        
+    def _collect_diagnostic_questions(self):
+        """Build diagnostic questions from the form's widget values in session state."""
+        state = st.session_state
+        questions = []
+        
+        for i in range(MAX_DIAGNOSTIC_QUESTIONS):
+            question_text = state.get(f"question_{i}")
+            if not question_text:
+                continue
+                
+            question_type = state[f"qtype_{i}"]
+            options = []
+            if question_type == "multiple_choice":
+                options_input = state.get(f"options_{i}") or ""
+                options = [opt.strip() for opt in options_input.split('\n') if opt.strip()]
+                
+            questions.append({
+                "question": question_text,
+                "question_type": question_type,
+                "required": state[f"required_{i}"],
+                "options": options
+            })
+            
+        return questions
+        
+    def preview_article(self, article_data):
+        """Preview the article before saving."""
+        st.subheader("📋 Article Preview")
+        
         # Display preview
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.markdown(f"**Title:** {title}")
-            st.markdown(f"**Category:** {category} > {subcategory}")
-            st.markdown(f"**Difficulty:** {difficulty}")
-            st.markdown(f"**Time:** {estimated_time} minutes")
-            st.markdown(f"**Success Rate:** {success_rate:.0%}")
-            st.markdown(f"**Status:** {'Active' if is_active else 'Inactive'}")
+            st.markdown(f"**Title:** {article_data['title']}")
+            st.markdown(f"**Category:** {article_data['category']} > {article_data['subcategory']}")
+            st.markdown(f"**Difficulty:** {article_data['difficulty_level']}")
+            st.markdown(f"**Time:** {article_data['estimated_time_minutes']} minutes")
+            st.markdown(f"**Success Rate:** {article_data['success_rate']:.0%}")
+            st.markdown(f"**Status:** {'Active' if article_data['is_active'] else 'Inactive'}")
             
         with col2:
-            if keywords:
+            if article_data["keywords"]:
                 st.markdown("**Keywords:**")
-                for keyword in preview_data["keywords"]:
+                for keyword in article_data["keywords"]:
                     st.markdown(f"- {keyword}")
                     
-            if symptoms:
+            if article_data["symptoms"]:
                 st.markdown("**Symptoms:**")
-                for symptom in preview_data["symptoms"]:
+                for symptom in article_data["symptoms"]:
                     st.markdown(f"- {symptom}")
                     
         st.markdown("**Content:**")
-        st.markdown(content)
+        st.markdown(article_data["content"])
         
-        if solution_steps:
+        if article_data["solution_steps"]:
             st.markdown("**Solution Steps:**")
-            for step in solution_steps:
+            for step in article_data["solution_steps"]:
                 st.markdown(f"{step['order']}. **{step['title']}** ({step['step_type']})")
                 st.markdown(f"   {step['content']} ({step['estimated_time_minutes']} min)")
                 
-        if diagnostic_questions:
+        if article_data["diagnostic_questions"]:
             st.markdown("**Diagnostic Questions:**")
-            for q in diagnostic_questions:
+            for q in article_data["diagnostic_questions"]:
                 required_text = " (Required)" if q['required'] else ""
                 st.markdown(f"- **{q['question']}** [{q['question_type']}]{required_text}")
                 if q['options']:
                     for option in q['options']:
                         st.markdown(f"  - {option}")
                         
-    def save_article(self, title, category, subcategory, content, keywords,
-                    symptoms, difficulty, estimated_time, success_rate, is_active,
-                    solution_steps, diagnostic_questions):
+    def save_article(self, article_data):
         """Save the article to Elasticsearch."""
         try:
-            # Validate required fields
-            if not all([title, category, subcategory, content]):
-                st.error("Please fill in all required fields.")
-                return
-                
-            # Create article data
-            article_data = {
-                "title": title,
-                "category": category,
-                "subcategory": subcategory,
-                "content": content,
-                "keywords": [k.strip() for k in keywords.split(',') if k.strip()] if keywords else [],
-                "symptoms": [s.strip() for s in symptoms.split(',') if s.strip()] if symptoms else [],
-                "difficulty_level": difficulty,
-                "estimated_time_minutes": estimated_time,
-                "success_rate": success_rate,
-                "is_active": is_active,
-                "solution_steps": solution_steps,
-                "diagnostic_questions": diagnostic_questions,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
-            
             # Validate article
             validation_result = self.validator.validate_article(article_data)
             if not validation_result.is_valid:
@@ -388,12 +514,21 @@ class StreamlitAdmin:
                 st.session_state.selected_category = selected_category
                 st.rerun()
                 
-        # Get articles
+        # Results live in a fragment so card actions rerun only the list
+        self.show_article_results(
+            st.session_state.search_query,
+            st.session_state.selected_category
+        )
+        
+    @st.fragment
+    def show_article_results(self, search_query, selected_category):
+        """Search articles for the given filters and display them as cards."""
         try:
-            articles = self.es_manager.search_articles(
-                query=st.session_state.search_query if st.session_state.search_query else None,
-                category=st.session_state.selected_category if st.session_state.selected_category != "All" else None
+            results = self.es_manager.search_articles(
+                query=search_query if search_query else None,
+                category=selected_category if selected_category != "All" else None
             )
+            articles = results.get('articles', [])
             
             if not articles:
                 st.info("No articles found matching your criteria.")
@@ -471,7 +606,7 @@ class StreamlitAdmin:
             article_id = self.es_manager.index_article(new_article)
             if article_id:
                 st.success(f"Article duplicated successfully with ID: {article_id}")
-                st.rerun()
+                st.rerun(scope="fragment")
             else:
                 st.error("Failed to duplicate article.")
                 
@@ -483,7 +618,7 @@ class StreamlitAdmin:
         try:
             if self.es_manager.delete_article(article_id):
                 st.success("Article deleted successfully.")
-                st.rerun()
+                st.rerun(scope="fragment")
             else:
                 st.error("Failed to delete article.")
         except Exception as e:
@@ -678,14 +813,28 @@ class StreamlitAdmin:
             st.error("Please connect to Elasticsearch first.")
             return
             
-        try:
-            # Get basic stats
-            stats = self.es_manager.get_index_stats()
+        if st.button("Refresh"):
+            # Recompute the stored statistics first, so no worker can re-cache
+            # the old ones between the cache clear and the recompute
+            stats_stored = self.es_manager.refresh_dashboard_stats()
+            clear_dashboard_cache(self.es_manager.index_name)
+            self._dashboard_aggs = None
+            if not stats_stored:
+                st.warning("Could not store recomputed statistics; showing a live aggregation.")
+                self._dashboard_aggs = self.es_manager.get_dashboard_aggregations()
             
+        try:
             # Total articles
-            total_articles = stats.get('count', 0)
+            total_articles = self._fetch_dashboard_aggs().get('total', 0)
             st.metric("Total Articles", total_articles)
             
+            cache_stats = dashboard_cache_stats()
+            if cache_stats:
+                st.caption(
+                    f"Shared cache: {cache_stats['hits']} hits, "
+                    f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+                )
+            
             if total_articles == 0:
                 st.info("No articles found. Add some articles to see analytics.")
                 return
@@ -732,24 +881,24 @@ class StreamlitAdmin:
             recent_articles = self.get_recent_articles()
             
             if recent_articles:
-                for article in recent_articles[:5]:  # Show last 5
+                for article in recent_articles:
                     st.markdown(f"**{article['title']}** - {article['created_at'][:10]}")
                     
         except Exception as e:
             st.error(f"Error loading analytics: {e}")
             
+    def _fetch_dashboard_aggs(self):
+        """Fetch all dashboard statistics once per rerun."""
+        if self._dashboard_aggs is None:
+            self._dashboard_aggs = load_dashboard_stats(
+                self.es_manager, self.es_manager.index_name
+            )
+        return self._dashboard_aggs
+        
     def get_category_stats(self):
         """Get article count by category."""
         try:
-            # This would require implementing aggregation queries
-            # For now, return sample data
-            return {
-                "Email": 15,
-                "Hardware": 12,
-                "Software": 18,
-                "Network": 8,
-                "Data Management": 6
-            }
+            return self._fetch_dashboard_aggs().get('categories', {})
         except Exception as e:
             st.error(f"Error getting category stats: {e}")
             return {}
@@ -757,13 +906,7 @@ class StreamlitAdmin:
     def get_difficulty_stats(self):
         """Get article count by difficulty level."""
         try:
-            # This would require implementing aggregation queries
-            # For now, return sample data
-            return {
-                "Easy": 25,
-                "Medium": 20,
-                "Hard": 15
-            }
+            return self._fetch_dashboard_aggs().get('difficulty', {})
         except Exception as e:
             st.error(f"Error getting difficulty stats: {e}")
             return {}
@@ -771,14 +914,7 @@ class StreamlitAdmin:
     def get_success_rate_stats(self):
         """Get success rate statistics."""
         try:
-            # This would require implementing aggregation queries
-            # For now, return sample data
-            return {
-                "average": 0.85,
-                "highest": 0.98,
-                "lowest": 0.65,
-                "total": 0.85
-            }
+            return self._fetch_dashboard_aggs().get('success_rate', {})
         except Exception as e:
             st.error(f"Error getting success rate stats: {e}")
             return {}
@@ -786,13 +922,7 @@ class StreamlitAdmin:
     def get_recent_articles(self):
         """Get recently created articles."""
         try:
-            # This would require implementing date-based queries
-            # For now, return sample data
-            return [
-                {"title": "Sample Article 1", "created_at": "2024-01-15T10:00:00Z"},
-                {"title": "Sample Article 2", "created_at": "2024-01-14T15:30:00Z"},
-                {"title": "Sample Article 3", "created_at": "2024-01-13T09:15:00Z"}
-            ]
+            return self._fetch_dashboard_aggs().get('recent', [])
         except Exception as e:
             st.error(f"Error getting recent articles: {e}")
             return []
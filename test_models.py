@@ -3,7 +3,10 @@
 Test file to demonstrate the usage of models and utilities.
 """
 
+import contextlib
+import io
 import json
+import sys
 from datetime import datetime
 from models import (
     KnowledgeArticle, SolutionStep, DiagnosticQuestion, 
@@ -13,9 +16,29 @@ from utils import (
     TextProcessor, DataValidator, DataConverter, 
     IDGenerator, QueryParser
 )
-from config_manager import ConfigManager, Environment
+from config_manager import get_config_manager, Environment
 
 
+@contextlib.contextmanager
+def buffered_output():
+    """Collect a section's printed output and write it to stdout in one call."""
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            yield
+    finally:
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
+
+
+def make_fixture(model_cls, **data):
+    """Build a model from trusted fixture data without re-running validation."""
+    # Pydantic v2 names it model_construct; v1 only has construct
+    construct = getattr(model_cls, 'model_construct', None) or model_cls.construct
+    return construct(**data)
+
+
+@buffered_output()
 def test_models():
     """Test the Pydantic models."""
     print("🧪 Testing Pydantic Models")
@@ -85,6 +108,7 @@ def test_models():
         print(f"❌ KnowledgeArticle creation failed: {e}")
 
 
+@buffered_output()
 def test_utilities():
     """Test the utility functions."""
     print("\n🔧 Testing Utility Functions")
@@ -107,6 +131,9 @@ def test_utilities():
     slug = TextProcessor.generate_slug(sample_text, max_length=30)
     print(f"   Slug: {slug}")
     
+    expanded = TextProcessor.expand_synonyms(["printers"], match_prefixes=True)
+    print(f"   Prefix synonyms: {sorted(expanded)}")
+    
     # Test DataValidator
     print("\n2. Testing DataValidator:")
     test_data = {
@@ -167,6 +194,23 @@ def test_utilities():
     print(f"   Keywords: {entities['keywords']}")
 
 
+def test_extract_symptoms_overlapping_phrases():
+    """Overlapping symptom phrases are each reported."""
+    symptoms = TextProcessor.extract_symptoms("Cannot access problem since the update")
+    assert sorted(symptoms) == ["Cannot access", "access problem"]
+
+
+def test_expand_synonyms_prefixes():
+    """Prefix matching expands plurals and partial terms from 4 characters up."""
+    assert "printing" in TextProcessor.expand_synonyms(["printers"], match_prefixes=True)
+    assert "password" in TextProcessor.expand_synonyms(["passwo"], match_prefixes=True)
+    # Exact lookups only unless prefix matching is asked for
+    assert TextProcessor.expand_synonyms(["printers"]) == ["printers"]
+    # "app" is a known term but shorter than MIN_PREFIX_LENGTH
+    assert TextProcessor.expand_synonyms(["apps"], match_prefixes=True) == ["apps"]
+
+
+@buffered_output()
 def test_configuration():
     """Test the configuration management."""
     print("\n⚙️ Testing Configuration Management")
@@ -174,7 +218,7 @@ def test_configuration():
     
     # Test development environment
     print("\n1. Testing Development Environment:")
-    dev_config = ConfigManager(Environment.DEVELOPMENT)
+    dev_config = get_config_manager(Environment.DEVELOPMENT)
     
     es_config = dev_config.get_elasticsearch_config()
     print(f"   Elasticsearch Host: {es_config['hosts'][0]['host']}")
@@ -188,7 +232,7 @@ def test_configuration():
     
     # Test production environment
     print("\n2. Testing Production Environment:")
-    prod_config = ConfigManager(Environment.PRODUCTION)
+    prod_config = get_config_manager(Environment.PRODUCTION)
     
     prod_es_config = prod_config.get_elasticsearch_config()
     print(f"   Elasticsearch Timeout: {prod_es_config['timeout']}")
@@ -199,6 +243,7 @@ def test_configuration():
     print(f"   Production Replicas: {prod_index_config['number_of_replicas']}")
 
 
+@buffered_output()
 def test_integration():
     """Test integration between components."""
     print("\n🔗 Testing Integration")
@@ -210,14 +255,16 @@ def test_integration():
     try:
         # Create solution steps
         steps = [
-            SolutionStep(
+            make_fixture(
+                SolutionStep,
                 order=1,
                 title="Check Physical Connections",
                 content="Ensure the printer is powered on and connected",
                 step_type=SolutionStepType.INSTRUCTION,
                 estimated_time_minutes=2
             ),
-            SolutionStep(
+            make_fixture(
+                SolutionStep,
                 order=2,
                 title="Verify Network Connection",
                 content="Check if printer is on the same network",
@@ -228,12 +275,14 @@ def test_integration():
         
         # Create diagnostic questions
         questions = [
-            DiagnosticQuestion(
+            make_fixture(
+                DiagnosticQuestion,
                 question="Is the printer powered on?",
                 question_type=QuestionType.YES_NO,
                 required=True
             ),
-            DiagnosticQuestion(
+            make_fixture(
+                DiagnosticQuestion,
                 question="Is this a network printer?",
                 question_type=QuestionType.YES_NO,
                 required=True
@@ -241,7 +290,8 @@ def test_integration():
         ]
         
         # Create the article
-        article = KnowledgeArticle(
+        article = make_fixture(
+            KnowledgeArticle,
             title="Fixing Printer Connection Issues",
             content="Step-by-step guide to resolve printer connectivity problems...",
             category="Hardware",
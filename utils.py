@@ -5,17 +5,161 @@ Provides text processing, validation, conversion, and helper functions.
 
 import re
 import json
+import functools
 import hashlib
+import itertools
+import time
 import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Union, Tuple
 from pathlib import Path
 import logging
+from collections import Counter
 from urllib.parse import quote_plus, unquote_plus
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Article IDs must fit the Elasticsearch "integer" mapping (31 bits): the low
+# bits hold a per-process sequence so IDs issued in the same millisecond differ
+_ARTICLE_ID_SEQUENCE_BITS = 8
+_ARTICLE_ID_TIME_MASK = (1 << (31 - _ARTICLE_ID_SEQUENCE_BITS)) - 1
+_ARTICLE_ID_SEQUENCE_MASK = (1 << _ARTICLE_ID_SEQUENCE_BITS) - 1
+_article_id_sequence = itertools.count()
+
+# Patterns are compiled once at import time; these run on every query
+
+# Any run of characters other than word characters, hyphens and apostrophes;
+# whitespace included, so one substitution both strips and collapses
+_NONWORD_RUN_RE = re.compile(r"[^\w\-']+")
+# Same for ASCII-only text, where both agree; ASCII classes skip the Unicode
+# property lookups and substitute about 20% faster
+_NONWORD_RUN_ASCII_RE = re.compile(r"[^\w\-']+", re.ASCII)
+# Characters clean_text would rewrite in already-lowercase text (double
+# spaces are checked separately; an alternation here halves scan speed).
+# ASCII-only: non-ASCII letters merely send the text down the full path
+_NEEDS_CLEANING_RE = re.compile(r"[^\w\-' ]", re.ASCII)
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+_SLUG_DASHES_RE = re.compile(r'-{2,}')
+
+# ASCII slugs: keep word characters, turn whitespace into hyphens, drop the rest
+_SLUG_TABLE = str.maketrans({
+    char: char if (char.isalnum() or char in '_-') else ('-' if char.isspace() else None)
+    for char in map(chr, range(128))
+})
+
+# Symptom phrases that never overlap share one alternation, so the text is
+# scanned once for them; no two match at the same position, so alternative
+# order does not matter. "access problem" can overlap "cannot access" and
+# gets its own scan so both are still reported
+_SYMPTOM_RES = (
+    re.compile('|'.join([
+        r'(?:cannot|cant|can\'t)\s+(?:log\s+in|access|connect|use|open)',
+        r'(?:not\s+working|doesn\'t\s+work|isn\'t\s+working)',
+        r'(?:error|failed|failure|broken|damaged)',
+        r'(?:slow|sluggish|freezing|crashing)',
+        r'(?:missing|lost|deleted|corrupted)'
+    ])),
+    re.compile(r'(?:password|login|access)\s+(?:problem|issue|trouble)')
+)
+
+_INTENT_PATTERNS = {
+    'password_reset': [
+        r'password.*reset|reset.*password|forgot.*password|change.*password',
+        r'can\'t.*log.*in|cannot.*log.*in|locked.*out'
+    ],
+    'printer_issue': [
+        r'printer.*not.*working|printer.*offline|can\'t.*print',
+        r'print.*error|printer.*problem'
+    ],
+    'internet_slow': [
+        r'slow.*internet|internet.*slow|slow.*connection',
+        r'web.*slow|loading.*slow'
+    ],
+    'software_update': [
+        r'software.*update|update.*software|install.*update',
+        r'new.*version|latest.*version'
+    ],
+    'file_recovery': [
+        r'deleted.*file|lost.*file|recover.*file',
+        r'file.*missing|restore.*file'
+    ]
+}
+
+_INTENT_RES = {
+    intent: [re.compile(pattern) for pattern in patterns]
+    for intent, patterns in _INTENT_PATTERNS.items()
+}
+
+# One alternation per intent; a single scan rules out intents that don't occur
+_INTENT_ANY_RES = {
+    intent: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+    for intent, patterns in _INTENT_PATTERNS.items()
+}
+
+_TIME_RES = [re.compile(pattern) for pattern in [
+    r'(\d+)\s*(?:min|minute|minutes)',
+    r'(\d+)\s*(?:hour|hours)',
+    r'quick|fast|urgent|emergency'
+]]
+
+
+def _build_synonym_index(terms: Dict[str, List[str]]) -> Dict[str, Tuple[str, ...]]:
+    """Map every main term and synonym to the full group(s) it expands to."""
+    index: Dict[str, List[str]] = {}
+    for main_term, synonyms in terms.items():
+        group = [main_term] + synonyms
+        for word in group:
+            index.setdefault(word, []).extend(group)
+    return {word: tuple(dict.fromkeys(group)) for word, group in index.items()}
+
+
+# Marks the node where a known term ends; terms never contain NUL
+_TRIE_END = '\0'
+
+
+def _build_synonym_trie(index: Dict[str, Tuple[str, ...]]) -> Dict[str, Any]:
+    """Build a character trie over the synonym index for prefix lookups."""
+    trie: Dict[str, Any] = {}
+    for word, group in index.items():
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_TRIE_END] = group
+    return trie
+
+
+@functools.lru_cache(maxsize=None)
+def _get_stemmer() -> Optional[Any]:
+    """Return a Porter stemmer, or None if NLTK is not installed."""
+    # Imported on first use: loading nltk takes about a third of a second
+    try:
+        from nltk.stem.porter import PorterStemmer
+    except ImportError:
+        return None
+    return PorterStemmer()
+
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting a trailing 'Z' for UTC."""
+    if CISO8601_AVAILABLE:
+        # C parser; handles 'Z' natively and raises ValueError like stdlib
+        return ciso8601.parse_datetime(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
 
 class TextProcessor:
     """Text processing utilities for helpdesk content."""
@@ -38,13 +182,20 @@ class TextProcessor:
         'uninstall': ['remove', 'delete']
     }
     
+    # Reverse lookup so expansion is one dict hit per term
+    SYNONYM_INDEX = _build_synonym_index(IT_TERMS)
+    SYNONYM_TRIE = _build_synonym_trie(SYNONYM_INDEX)
+    
+    # Shortest known term allowed to match as a prefix ("pass" in "passwo")
+    MIN_PREFIX_LENGTH = 4
+    
     # Common stop words for IT content
-    STOP_WORDS = {
+    STOP_WORDS = frozenset({
         'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
         'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
         'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
         'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
-    }
+    })
     
     @staticmethod
     def clean_text(text: str) -> str:
@@ -60,19 +211,16 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters but keep hyphens and apostrophes
-        text = re.sub(r'[^\w\s\-']', ' ', text)
+        # Keywords, tags and stored titles are usually clean already
+        if (text.islower() and '  ' not in text and
+                _NEEDS_CLEANING_RE.search(text) is None):
+            return text.strip()
         
-        # Clean up whitespace again
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        # Lowercase, replace special characters (keeping hyphens and
+        # apostrophes) and collapse whitespace in a single pass
+        text = text.lower()
+        pattern = _NONWORD_RUN_ASCII_RE if text.isascii() else _NONWORD_RUN_RE
+        return pattern.sub(' ', text).strip()
     
     @staticmethod
     def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
@@ -89,36 +237,40 @@ class TextProcessor:
         if not text:
             return []
         
+        # Callers own the returned list; the cache keeps an immutable tuple
+        return list(TextProcessor._extract_keywords_cached(text, max_keywords))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _extract_keywords_cached(text: str, max_keywords: int) -> Tuple[str, ...]:
+        """Extract keywords for text not yet in the cache."""
         # Clean the text
         cleaned_text = TextProcessor.clean_text(text)
         
-        # Split into words
-        words = cleaned_text.split()
-        
-        # Filter out stop words and short words
-        keywords = []
-        for word in words:
-            if (len(word) > 2 and 
-                word not in TextProcessor.STOP_WORDS and
-                not word.isdigit()):
-                keywords.append(word)
-        
-        # Count word frequency
-        word_freq = {}
-        for word in keywords:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency and return top keywords
-        sorted_keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_keywords[:max_keywords]]
+        # Filter out stop words, short words and numbers; only words that
+        # start with a digit can be all digits
+        stop_words = TextProcessor.STOP_WORDS
+        keywords = (
+            word for word in cleaned_text.split()
+            if (len(word) > 2 and
+                word not in stop_words and
+                not (word[0].isdigit() and word.isdigit()))
+        )
+        
+        # Count word frequency; most_common keeps only the top entries in a
+        # heap and breaks ties by first occurrence, like a stable sort
+        word_freq = Counter(keywords)
+        return tuple(word for word, freq in word_freq.most_common(max_keywords))
     
     @staticmethod
-    def expand_synonyms(terms: List[str]) -> List[str]:
+    def expand_synonyms(terms: List[str], match_prefixes: bool = False) -> List[str]:
         """
         Expand terms with their synonyms.
         
         Args:
             terms: List of terms to expand
+            match_prefixes: Also expand terms that extend a known term,
+                e.g. "printers" or a partially typed "passwo"
             
         Returns:
             Expanded list with synonyms
@@ -127,12 +279,44 @@ class TextProcessor:
         
         for term in terms:
             term_lower = term.lower()
-            for main_term, synonyms in TextProcessor.IT_TERMS.items():
-                if term_lower in synonyms or term_lower == main_term:
-                    expanded.update([main_term] + synonyms)
+            group = TextProcessor.SYNONYM_INDEX.get(term_lower)
+            if group is None and match_prefixes:
+                group = TextProcessor._longest_prefix_group(term_lower)
+            expanded.update(group or ())
         
         return list(expanded)
     
+    @staticmethod
+    def _longest_prefix_group(term: str) -> Optional[Tuple[str, ...]]:
+        """Return the synonym group of the longest known term that prefixes term."""
+        node = TextProcessor.SYNONYM_TRIE
+        group = None
+        for depth, char in enumerate(term, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if depth >= TextProcessor.MIN_PREFIX_LENGTH and _TRIE_END in node:
+                group = node[_TRIE_END]
+        return group
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def stem_text(text: str) -> str:
+        """
+        Reduce each word of text to its stem.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Stemmed text, or the text unchanged if NLTK is not installed
+        """
+        stemmer = _get_stemmer()
+        if stemmer is None or not text:
+            return text
+        
+        return ' '.join(stemmer.stem(word) for word in text.split())
+    
     @staticmethod
     def generate_slug(text: str, max_length: int = 50) -> str:
         """
@@ -149,8 +333,13 @@ class TextProcessor:
             return ""
         
         # Convert to lowercase and replace spaces with hyphens
-        slug = re.sub(r'[^\w\s-]', '', text.lower())
-        slug = re.sub(r'[-\s]+', '-', slug)
+        text = text.lower()
+        if text.isascii():
+            slug = _SLUG_DASHES_RE.sub('-', text.translate(_SLUG_TABLE))
+        else:
+            # Unicode word characters need the regex classes
+            slug = _SLUG_STRIP_RE.sub('', text)
+            slug = _SLUG_DASH_RE.sub('-', slug)
         
         # Truncate to max length
         if len(slug) > max_length:
@@ -172,25 +361,16 @@ class TextProcessor:
         if not text:
             return []
         
-        # Common symptom patterns
-        symptom_patterns = [
-            r'(?:cannot|cant|can\'t)\s+(?:log\s+in|access|connect|use|open)',
-            r'(?:not\s+working|doesn\'t\s+work|isn\'t\s+working)',
-            r'(?:error|failed|failure|broken|damaged)',
-            r'(?:slow|sluggish|freezing|crashing)',
-            r'(?:missing|lost|deleted|corrupted)',
-            r'(?:password|login|access)\s+(?:problem|issue|trouble)'
-        ]
-        
-        symptoms = []
-        for pattern in symptom_patterns:
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
+        text_lower = text.lower()
+        
+        symptoms = set()
+        for pattern in _SYMPTOM_RES:
+            for match in pattern.finditer(text_lower):
                 symptom = text[match.start():match.end()].strip()
-                if symptom and len(symptom) > 5:
-                    symptoms.append(symptom)
+                if len(symptom) > 5:
+                    symptoms.add(symptom)
         
-        return list(set(symptoms))
+        return list(symptoms)
 
 
 class DataValidator:
@@ -278,8 +458,12 @@ class DataValidator:
         errors = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if ORJSON_AVAILABLE:
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                data = orjson.loads(Path(file_path).read_bytes())
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
         except FileNotFoundError:
             return False, ["File not found"]
         except json.JSONDecodeError as e:
@@ -322,24 +506,24 @@ class DataConverter:
         # Create a copy to avoid modifying original
         article = data.copy()
         
-        # Ensure timestamps are in ISO format
-        if 'created_at' in article and article['created_at']:
-            if isinstance(article['created_at'], str):
-                try:
-                    datetime.fromisoformat(article['created_at'].replace('Z', '+00:00'))
-                except ValueError:
-                    article['created_at'] = datetime.utcnow().isoformat()
-            else:
-                article['created_at'] = datetime.utcnow().isoformat()
-        
-        if 'updated_at' in article and article['updated_at']:
-            if isinstance(article['updated_at'], str):
+        # Ensure timestamps are in ISO format; both fallbacks share one
+        # timestamp, taken only if a field actually needs it
+        now_iso = None
+        for field in ('created_at', 'updated_at'):
+            value = article.get(field)
+            if not value:
+                continue
+            if isinstance(value, str):
                 try:
-                    datetime.fromisoformat(article['updated_at'].replace('Z', '+00:00'))
+                    # Only validating here, so a trailing 'Z' can simply be
+                    # dropped instead of rewritten as an offset
+                    datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+                    continue
                 except ValueError:
-                    article['updated_at'] = datetime.utcnow().isoformat()
-            else:
-                article['updated_at'] = datetime.utcnow().isoformat()
+                    pass
+            if now_iso is None:
+                now_iso = datetime.utcnow().isoformat()
+            article[field] = now_iso
         
         # Ensure boolean fields are proper booleans
         boolean_fields = ['is_active']
@@ -395,10 +579,10 @@ class DataConverter:
         es_doc = article.copy()
         
         # Ensure required Elasticsearch fields
-        if 'created_at' not in es_doc:
-            es_doc['created_at'] = datetime.utcnow().isoformat()
-        if 'updated_at' not in es_doc:
-            es_doc['updated_at'] = datetime.utcnow().isoformat()
+        if 'created_at' not in es_doc or 'updated_at' not in es_doc:
+            now_iso = datetime.utcnow().isoformat()
+            es_doc.setdefault('created_at', now_iso)
+            es_doc.setdefault('updated_at', now_iso)
         
         # Convert datetime objects to ISO strings
         for field in ['created_at', 'updated_at', 'last_reviewed']:
@@ -437,7 +621,7 @@ class DataConverter:
         for field in ['created_at', 'updated_at', 'last_reviewed']:
             if field in article and article[field]:
                 try:
-                    article[field] = datetime.fromisoformat(article[field].replace('Z', '+00:00'))
+                    article[field] = _parse_iso_datetime(article[field])
                 except ValueError:
                     # Keep as string if parsing fails
                     pass
@@ -457,8 +641,12 @@ class IDGenerator:
             Unique article ID
         """
         # In a real system, this would come from a database sequence
-        # For now, use timestamp-based ID
-        return int(datetime.utcnow().timestamp() * 1000) % 1000000
+        # For now, use a timestamp-based ID: milliseconds in the high bits,
+        # a sequence number in the low bits
+        millis = (time.time_ns() // 1_000_000) & _ARTICLE_ID_TIME_MASK
+        sequence = next(_article_id_sequence) & _ARTICLE_ID_SEQUENCE_MASK
+        # Article IDs start at 1
+        return (millis << _ARTICLE_ID_SEQUENCE_BITS | sequence) or 1
     
     @staticmethod
     def generate_uuid() -> str:
@@ -521,39 +709,26 @@ class QueryParser:
         Returns:
             Tuple of (intent, confidence_score)
         """
+        # Repeated queries (autocomplete, retries) are answered from the cache
+        return QueryParser._extract_intent_cached(query)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _extract_intent_cached(query: str) -> Tuple[str, float]:
+        """Extract the intent of a query not yet in the cache."""
         query_lower = query.lower()
         
-        # Define intent patterns
-        intent_patterns = {
-            'password_reset': [
-                r'password.*reset|reset.*password|forgot.*password|change.*password',
-                r'can\'t.*log.*in|cannot.*log.*in|locked.*out'
-            ],
-            'printer_issue': [
-                r'printer.*not.*working|printer.*offline|can\'t.*print',
-                r'print.*error|printer.*problem'
-            ],
-            'internet_slow': [
-                r'slow.*internet|internet.*slow|slow.*connection',
-                r'web.*slow|loading.*slow'
-            ],
-            'software_update': [
-                r'software.*update|update.*software|install.*update',
-                r'new.*version|latest.*version'
-            ],
-            'file_recovery': [
-                r'deleted.*file|lost.*file|recover.*file',
-                r'file.*missing|restore.*file'
-            ]
-        }
-        
         best_intent = 'general_help'
         best_score = 0.0
         
-        for intent, patterns in intent_patterns.items():
+        for intent, patterns in _INTENT_RES.items():
+            # Most intents don't match at all; skip their per-pattern counts
+            if not _INTENT_ANY_RES[intent].search(query_lower):
+                continue
+            
             score = 0.0
             for pattern in patterns:
-                matches = re.findall(pattern, query_lower)
+                matches = pattern.findall(query_lower)
                 if matches:
                     score += len(matches) * 0.3
             
@@ -601,14 +776,8 @@ class QueryParser:
         entities['keywords'] = keywords
         
         # Extract time constraints
-        time_patterns = [
-            r'(\d+)\s*(?:min|minute|minutes)',
-            r'(\d+)\s*(?:hour|hours)',
-            r'quick|fast|urgent|emergency'
-        ]
-        
-        for pattern in time_patterns:
-            matches = re.findall(pattern, query_lower)
+        for pattern in _TIME_RES:
+            matches = pattern.findall(query_lower)
             entities['time_constraints'].extend(matches)
         
         return entities